@@ -10,15 +10,115 @@ import os    # Operaciones del sistema de archivos (p.ej., asegurarse de que el
 import pytesseract  # Interfaz de Python para Tesseract OCR (reconocimiento óptico de caracteres)
 from PIL import Image  # Biblioteca Pillow para manejar imágenes
 import io   # Para trabajar con flujos de datos binarios en memoria
+import sys  # Para ajustar el path de importación al ejecutar como script
+from typing import Optional, Iterable, List, Tuple  # Tipos para anotaciones
 
-def extract_text(pdf_path: str) -> dict:
+if __package__ in (None, ""):
+    # Ejecutado como script: agregar 'src' al path para poder importar 'utils'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.utils import parse_page_ranges, select_pages  # Selección de rangos de páginas
+
+def extract_digital_blocks(page: fitz.Page) -> Tuple[List[dict], bool]:
+    """
+    Extrae los fragmentos (spans) de texto digital de una página, con su posición y estilo.
+
+    Args:
+        page (fitz.Page): Página de PyMuPDF a procesar.
+
+    Returns:
+        Tuple[List[dict], bool]: Lista de bloques de texto y un indicador de si la página
+        contiene texto digital (si es False, la página necesita OCR).
+    """
+    # Extraer el contenido de la página en formato de diccionario (incluye texto y potencialmente imágenes)
+    page_dict = page.get_text("dict")  # type: ignore
+    blocks = []
+    # Variable de control para saber si se extrajo algún texto digital en esta página
+    has_digital_text = False
+
+    # Recorrer cada bloque identificado en la página
+    for block in page_dict.get("blocks", []):
+        # Si el bloque no es de texto (por ejemplo, imagen u objeto de dibujo), omitirlo aquí.
+        # (El OCR se aplicará posteriormente si hace falta.)
+        if block.get("type") != 0:
+            continue
+        # Marcar que hay al menos un bloque de texto extraído digitalmente
+        has_digital_text = True
+        # Recorrer cada línea dentro del bloque de texto y cada fragmento (span) dentro de la línea
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                # Construir un diccionario con la información relevante del span de texto
+                blocks.append({
+                    "text": span.get("text", ""),    # Texto extraído del span
+                    "bbox": span.get("bbox", []),    # BBox [x0, y0, x1, y1] del span en la página
+                    "font": span.get("font", ""),    # Nombre de la fuente del texto
+                    "size": span.get("size", 0)      # Tamaño de fuente del texto
+                })
+    return blocks, has_digital_text
+
+def get_ocr_targets(doc: fitz.Document, page: fitz.Page) -> List[Tuple[Image.Image, list]]:
+    """
+    Obtiene las imágenes de una página sin texto digital sobre las que debe aplicarse OCR.
+    Si la página tiene imágenes embebidas se usan esas; si no (p.ej. contenido vectorial),
+    se renderiza la página completa.
+
+    Args:
+        doc (fitz.Document): Documento al que pertenece la página (para extraer imágenes por xref).
+        page (fitz.Page): Página de PyMuPDF a procesar.
+
+    Returns:
+        List[Tuple[Image.Image, list]]: Pares (imagen PIL, bbox) listos para OCR; bbox vacío si se desconoce.
+    """
+    targets = []
+    # Obtener todas las imágenes de la página (si las hay), con información detallada
+    image_list = page.get_images(full=True)
+    if image_list:
+        for img in image_list:
+            xref = img[0]  # Identificador de la imagen en el PDF (xref)
+            # Extraer los datos binarios de la imagen usando su xref
+            base_image = doc.extract_image(xref)
+            image_bytes = base_image.get("image", b"")
+            # Intentar obtener la posición (bbox) de la imagen si está disponible
+            image_bbox = img["bbox"] if "bbox" in img else []
+            # Convertir los bytes de la imagen a un objeto PIL Image para OCR
+            targets.append((Image.open(io.BytesIO(image_bytes)), image_bbox))
+    else:
+        # Renderizar la página a imagen (aumentando la escala para mejorar OCR, e.g., factor 2 para mayor resolución)
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # type: ignore
+        # Convertir el pixmap a una imagen PIL
+        mode = "RGBA" if pix.alpha else "RGB"
+        image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        # Sin bbox específico ya que proviene de la página completa
+        targets.append((image, []))
+    return targets
+
+def make_ocr_block(text: str, bbox: list) -> dict:
+    """
+    Construye un bloque de texto proveniente de OCR con la misma forma que los bloques digitales.
+
+    Args:
+        text (str): Texto reconocido (ya recortado).
+        bbox (list): BBox de la imagen de origen, o lista vacía si se desconoce.
+
+    Returns:
+        dict: Bloque con fuente "OCR" y tamaño 0.
+    """
+    return {
+        "text": text,
+        "bbox": bbox if bbox else [],  # BBox de la imagen si se tiene, sino lista vacía
+        "font": "OCR",    # Marcar fuente como "OCR" ya que proviene de reconocimiento óptico
+        "size": 0         # Tamaño de fuente desconocido, se usa 0 como indicador
+    }
+
+def extract_text(pdf_path: str, pages: Optional[Iterable[int]] = None) -> dict:
     """
     Extrae el contenido textual de cada página de un PDF, junto con su posición y estilo,
     utilizando PyMuPDF para texto digital y Tesseract OCR para texto embebido en imágenes.
     Si una página no tiene texto digital (por ejemplo, páginas escaneadas), se aplicará OCR automáticamente.
+    Si se indica una selección de páginas, solo esas páginas se cargan y procesan (incluido el OCR).
 
     Args:
         pdf_path (str): Ruta al archivo PDF de entrada.
+        pages (Iterable[int], opcional): Números de página (1-indexados) a extraer; por defecto todas.
 
     Returns:
         dict: Diccionario con la estructura del contenido extraído. Tiene la forma:
@@ -45,92 +145,30 @@ def extract_text(pdf_path: str) -> dict:
     # Inicializar la estructura de resultado con una lista de páginas
     result = {"pages": []}
 
-    # Recorrer cada página del documento por índice
-    for page_index in range(len(doc)):
+    # Validar la selección de páginas antes de procesar nada
+    try:
+        page_numbers = select_pages(pages, len(doc))
+    except ValueError:
+        doc.close()
+        raise
+
+    # Recorrer solo las páginas seleccionadas, por índice (0-indexado)
+    for page_index in (number - 1 for number in page_numbers):
         # Obtener el objeto de página actual
         page: fitz.Page = doc[page_index]
-        # Extraer el contenido de la página en formato de diccionario (incluye texto y potencialmente imágenes)
-        page_dict = page.get_text("dict")  # type: ignore
+        # Extraer los spans de texto digital de la página
+        blocks, has_digital_text = extract_digital_blocks(page)
         # Preparar la estructura de datos para esta página, incluyendo su número (1-indexado)
-        page_data = {"number": page_index + 1, "blocks": []}
-
-        # Variable de control para saber si se extrajo algún texto digital en esta página
-        extracted_text = False
-
-        # Recorrer cada bloque identificado en la página
-        for block in page_dict.get("blocks", []):
-            # Si el bloque es de tipo texto (type 0 en PyMuPDF), procesarlo
-            if block.get("type") == 0:
-                # Marcar que hay al menos un bloque de texto extraído digitalmente
-                extracted_text = True
-                # Recorrer cada línea dentro del bloque de texto
-                for line in block.get("lines", []):
-                    # Recorrer cada fragmento (span) dentro de la línea
-                    for span in line.get("spans", []):
-                        # Construir un diccionario con la información relevante del span de texto
-                        block_info = {
-                            "text": span.get("text", ""),    # Texto extraído del span
-                            "bbox": span.get("bbox", []),    # BBox [x0, y0, x1, y1] del span en la página
-                            "font": span.get("font", ""),    # Nombre de la fuente del texto
-                            "size": span.get("size", 0)      # Tamaño de fuente del texto
-                        }
-                        # Añadir el bloque de texto extraído a la lista de bloques de la página
-                        page_data["blocks"].append(block_info)
-            # Si el bloque no es de texto (por ejemplo, imagen u objeto de dibujo), omitirlo aquí.
-            # (El OCR se aplicará posteriormente si hace falta.)
-            else:
-                continue
+        page_data = {"number": page_index + 1, "blocks": blocks}
 
         # Si no se encontró texto digital en la página, utilizar OCR para extraer texto de imágenes
-        if not extracted_text:
-            # Obtener todas las imágenes de la página (si las hay), con información detallada
-            image_list = page.get_images(full=True)
-            # Si existen imágenes en la página, aplicar OCR a cada una
-            if image_list:
-                for img in image_list:
-                    xref = img[0]  # Identificador de la imagen en el PDF (xref)
-                    # Extraer los datos binarios de la imagen usando su xref
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image.get("image", b"")
-                    # Intentar obtener la posición (bbox) de la imagen si está disponible
-                    image_bbox = None
-                    if "bbox" in img:
-                        image_bbox = img["bbox"]
-                    # Si no se proporcionó bbox, se asignará un bbox vacío luego
-                    # Convertir los bytes de la imagen a un objeto PIL Image para OCR
-                    image = Image.open(io.BytesIO(image_bytes))
-                    # Aplicar OCR a la imagen para obtener texto (asumiendo idioma inglés por defecto)
-                    ocr_text = pytesseract.image_to_string(image, lang="eng")
-                    # Limpiar el texto OCR (quitar espacios en extremos)
-                    ocr_text = ocr_text.strip()
-                    # Si se obtuvo algún texto de la imagen, agregarlo a los bloques de la página
-                    if ocr_text:
-                        block_info = {
-                            "text": ocr_text,
-                            "bbox": image_bbox if image_bbox else [],  # BBox de la imagen si se tiene, sino lista vacía
-                            "font": "OCR",    # Marcar fuente como "OCR" ya que proviene de reconocimiento óptico
-                            "size": 0         # Tamaño de fuente desconocido, se usa 0 como indicador
-                        }
-                        page_data["blocks"].append(block_info)
-            else:
-                # Si la página no tiene texto ni imágenes (por ejemplo, contenido vectorial), 
-                # renderizar la página completa y aplicar OCR sobre el renderizado.
-                # Renderizar la página a imagen (aumentando la escala para mejorar OCR, e.g., factor 2 para mayor resolución)
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # type: ignore
-                # Convertir el pixmap a una imagen PIL
-                mode = "RGBA" if pix.alpha else "RGB"
-                image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
-                # Aplicar OCR a la imagen renderizada de la página
+        if not has_digital_text:
+            for image, image_bbox in get_ocr_targets(doc, page):
+                # Aplicar OCR a la imagen para obtener texto (asumiendo idioma inglés por defecto)
                 ocr_text = pytesseract.image_to_string(image, lang="eng").strip()
-                # Si se obtuvo texto del OCR, agregarlo como un único bloque que cubre toda la página
+                # Si se obtuvo algún texto de la imagen, agregarlo a los bloques de la página
                 if ocr_text:
-                    block_info = {
-                        "text": ocr_text,
-                        "bbox": [],   # Sin bbox específico ya que proviene de la página completa
-                        "font": "OCR",
-                        "size": 0
-                    }
-                    page_data["blocks"].append(block_info)
+                    page_data["blocks"].append(make_ocr_block(ocr_text, image_bbox))
 
         # Agregar la información de esta página procesada a la lista de páginas en el resultado
         result["pages"].append(page_data)
@@ -165,10 +203,11 @@ if __name__ == "__main__":
     )
     parser.add_argument("--input", "-i", required=True, help="Ruta al PDF de entrada.")
     parser.add_argument("--output", "-o", required=True, help="Ruta al archivo JSON de salida.")
+    parser.add_argument("--pages", type=parse_page_ranges, default=None, help="Páginas a extraer, p.ej. '40-60,120' (por defecto todas).")
     args = parser.parse_args()
 
     # Llamar a la función de extracción con la ruta de entrada proporcionada
-    extracted_data = extract_text(args.input)
+    extracted_data = extract_text(args.input, pages=args.pages)
     # Guardar los datos extraídos en el archivo JSON de salida
     save_to_json(extracted_data, args.output)
     # Informar al usuario que la extracción ha finalizado
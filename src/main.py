@@ -5,20 +5,38 @@ Script principal que coordina todo el pipeline de traducción de un PDF:
 1) Extrae texto digital y OCR -> JSON intermedio.
 2) Traduce todos los bloques de texto -> JSON traducido.
 3) Reconstruye el PDF en español usando el JSON traducido y el PDF original.
+
+Con --pages solo se procesan las páginas indicadas (p.ej. "40-60,120"), para obtener vistas previas
+rápidas; con --patch esas páginas se reemplazan dentro de un PDF traducido existente.
+Con --overlap los pasos 1 y 2 se solapan: el OCR de páginas escaneadas corre en subprocesos
+asíncronos mientras el modelo traduce las páginas ya disponibles.
 """
 
 import os
 import argparse
 import json
+import asyncio
+from typing import Optional, Iterable, Union
 
 # Importar funciones de los módulos ya desarrollados
 from extract.extractor import extract_text, save_to_json
-from translate.translator import load_translation_pipeline, translate_blocks
+from translate.translator import load_translation_pipeline, translate_blocks, load_glossary, build_masking_pattern
 from pdfbuilder.builder import reconstruct_pdf
+from pipeline.async_pipeline import extract_and_translate_async, format_timings
+from utils.utils import parse_page_ranges
 from tqdm import tqdm  # Para barra de progreso
 
+def _positive_int(value: str) -> int:
+    """Tipo de argparse para enteros mayores o iguales a 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero mayor o igual a 1: {value!r}")
+    return number
+
 def main(pdf_input: str, pdf_output: str, temp_json: str, temp_translated_json: str,
-         model_name: str, device: int, batch_size: int):
+         model_name: str, device: int, batch_size: int, glossary_path: Optional[str] = None,
+         pages: Optional[Iterable[Union[int, range]]] = None, base_pdf: Optional[str] = None,
+         overlap: bool = False, ocr_workers: int = 4):
     """
     Ejecuta el flujo completo de traducción de un PDF.
 
@@ -30,27 +48,59 @@ def main(pdf_input: str, pdf_output: str, temp_json: str, temp_translated_json:
         model_name (str): Modelo de HuggingFace a usar.
         device (int): Dispositivo para traducción (GPU=0, CPU=-1).
         batch_size (int): Número de bloques a traducir por batch.
+        glossary_path (str, opcional): Ruta a un glosario JSON con términos a conservar o fijar.
+        pages (Iterable, opcional): Números o rangos de página (1-indexados), como los de
+            parse_page_ranges, a procesar; por defecto todas.
+        base_pdf (str, opcional): PDF traducido existente en el que parchear las páginas procesadas.
+        overlap (bool): Si es True, solapa OCR y traducción con asyncio e imprime un desglose de tiempos.
+        ocr_workers (int): Máximo de procesos de Tesseract simultáneos en modo overlap.
     """
-    # 1. Extracción de texto digital + OCR
-    print("1/3 Extrayendo texto del PDF (digital + OCR)...")
-    data = extract_text(pdf_input)
-    save_to_json(data, temp_json)
-    print(f"   JSON de extracción guardado en: {temp_json}\n")
+    # Cargar glosario y compilar el patrón de enmascarado una sola vez para todo el libro
+    glossary = load_glossary(glossary_path) if glossary_path else None
+    masking_pattern = build_masking_pattern(glossary)
+
+    if overlap:
+        # 1+2. Extracción y traducción solapadas: el OCR de páginas escaneadas corre mientras se traducen las demás
+        print("1-2/3 Extrayendo y traduciendo en paralelo (OCR asíncrono + traducción en cola)...")
+        pipeline = load_translation_pipeline(model_name=model_name, device=device)
+        data, timings = asyncio.run(extract_and_translate_async(
+            pdf_input, pipeline, batch_size=batch_size, pages=pages, ocr_concurrency=ocr_workers,
+            masking_pattern=masking_pattern, glossary=glossary
+        ))
+        # Guardar el JSON de extracción sin las traducciones, como en el flujo secuencial
+        extracted = {"pages": [
+            {"number": page["number"],
+             "blocks": [{k: v for k, v in block.items() if k != "translated"} for block in page["blocks"]]}
+            for page in data["pages"]
+        ]}
+        save_to_json(extracted, temp_json)
+        save_to_json(data, temp_translated_json)
+        print(f"   JSON de extracción guardado en: {temp_json}")
+        print(f"   JSON de traducción guardado en: {temp_translated_json}")
+        print("   Desglose de tiempos:")
+        print(format_timings(timings) + "\n")
+    else:
+        # 1. Extracción de texto digital + OCR
+        print("1/3 Extrayendo texto del PDF (digital + OCR)...")
+        data = extract_text(pdf_input, pages=pages)
+        save_to_json(data, temp_json)
+        print(f"   JSON de extracción guardado en: {temp_json}\n")
 
-    # 2. Traducción de bloques
-    print("2/3 Traduciendo bloques de texto...")
-    # Cargar pipeline de traducción
-    pipeline = load_translation_pipeline(model_name=model_name, device=device)
-    # Traducir página por página con barra de progreso
-    for page in tqdm(data.get("pages", []), desc="Páginas", unit="página"):
-        page["blocks"] = translate_blocks(page["blocks"], pipeline, batch_size=batch_size)
-    # Guardar JSON con traducciones
-    save_to_json(data, temp_translated_json)
-    print(f"   JSON de traducción guardado en: {temp_translated_json}\n")
+        # 2. Traducción de bloques
+        print("2/3 Traduciendo bloques de texto...")
+        # Cargar pipeline de traducción
+        pipeline = load_translation_pipeline(model_name=model_name, device=device)
+        # Traducir página por página con barra de progreso
+        for page in tqdm(data.get("pages", []), desc="Páginas", unit="página"):
+            page["blocks"] = translate_blocks(page["blocks"], pipeline, batch_size=batch_size,
+                                              masking_pattern=masking_pattern, glossary=glossary)
+        # Guardar JSON con traducciones
+        save_to_json(data, temp_translated_json)
+        print(f"   JSON de traducción guardado en: {temp_translated_json}\n")
 
     # 3. Reconstrucción del PDF traducido
     print("3/3 Reconstruyendo el PDF traducido...")
-    reconstruct_pdf(temp_translated_json, pdf_input, pdf_output)
+    reconstruct_pdf(temp_translated_json, pdf_input, pdf_output, pages=pages, base_pdf=base_pdf)
     print("\nProceso completado. ¡Tu libro traducido está listo!")
 
 if __name__ == "__main__":
@@ -62,6 +112,11 @@ if __name__ == "__main__":
     parser.add_argument("--model", default="Helsinki-NLP/opus-mt-en-es", help="Modelo HuggingFace para traducción.")
     parser.add_argument("--device", type=int, default=-1, help="Dispositivo para traducción: GPU(0) o CPU(-1).")
     parser.add_argument("--batch-size", type=int, default=16, help="Tamaño de lote para traducción.")
+    parser.add_argument("--glossary", default=None, help="Glosario JSON con términos a conservar o traducir de forma fija.")
+    parser.add_argument("--pages", type=parse_page_ranges, default=None, help="Páginas a procesar, p.ej. '40-60,120' (por defecto todas).")
+    parser.add_argument("--overlap", action="store_true", help="Solapar OCR y traducción (recomendado para libros con páginas escaneadas).")
+    parser.add_argument("--ocr-workers", type=_positive_int, default=4, help="Procesos de Tesseract simultáneos con --overlap.")
+    parser.add_argument("--patch", default=None, help="PDF traducido existente donde reemplazar las páginas procesadas (en lugar de emitir solo esas páginas).")
     args = parser.parse_args()
 
     # Asegurar que las carpetas de salida existan
@@ -77,5 +132,10 @@ if __name__ == "__main__":
         temp_translated_json=args.temp_translated_json,
         model_name=args.model,
         device=args.device,
-        batch_size=args.batch_size
+        batch_size=args.batch_size,
+        glossary_path=args.glossary,
+        pages=args.pages,
+        base_pdf=args.patch,
+        overlap=args.overlap,
+        ocr_workers=args.ocr_workers
     )
@@ -11,14 +11,21 @@ from PIL import Image      # Pillow para manipulación de imágenes
 import io                  # Para manejar streams de datos binarios
 import json                # Para exportar resultados a JSON
 import os                  # Operaciones con el sistema de archivos
+import sys                 # Para ajustar el path de importación al ejecutar como script
 
-def extract_images_from_pdf(pdf_path, images_dir):
+if __package__ in (None, ""):
+    # Ejecutado como script: agregar 'src' al path para poder importar 'utils'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.utils import parse_page_ranges, select_pages  # Selección de rangos de páginas
+
+def extract_images_from_pdf(pdf_path, images_dir, pages=None):
     """
     Extrae todas las imágenes de cada página de un PDF y las guarda en disco.
 
     Args:
         pdf_path (str): Ruta al PDF de entrada.
         images_dir (str): Carpeta donde guardar las imágenes extraídas.
+        pages (list, opcional): Números de página (1-indexados) a procesar; por defecto todas.
 
     Returns:
         list: Lista de diccionarios con información de cada imagen extraída.
@@ -29,7 +36,14 @@ def extract_images_from_pdf(pdf_path, images_dir):
     doc = fitz.open(pdf_path)   
     images_info = []    
 
-    for page_num in range(len(doc)):
+    # Validar la selección y recorrer solo las páginas pedidas (0-indexado)
+    try:
+        page_numbers = select_pages(pages, len(doc))
+    except ValueError:
+        doc.close()
+        raise
+
+    for page_num in (number - 1 for number in page_numbers):
         page = doc[page_num]
         images = page.get_images(full=True)
         for img_index, img in enumerate(images):
@@ -75,7 +89,7 @@ def ocr_image(image_path, lang="eng"):
     text = pytesseract.image_to_string(image, lang=lang)
     return text
 
-def extract_ocr_from_pdf_images(pdf_path, images_dir, output_json, lang="eng"):
+def extract_ocr_from_pdf_images(pdf_path, images_dir, output_json, lang="eng", pages=None):
     """
     Pipeline principal: extrae imágenes del PDF, aplica OCR a cada una
     y guarda los resultados en un archivo JSON.
@@ -85,9 +99,10 @@ def extract_ocr_from_pdf_images(pdf_path, images_dir, output_json, lang="eng"):
         images_dir (str): Carpeta temporal para imágenes extraídas.
         output_json (str): Archivo JSON de salida con resultados OCR.
         lang (str): Idioma para OCR (por defecto 'eng' inglés).
+        pages (list, opcional): Números de página (1-indexados) a procesar; por defecto todas.
     """
     print("Extrayendo imágenes del PDF...")
-    images_info = extract_images_from_pdf(pdf_path, images_dir)
+    images_info = extract_images_from_pdf(pdf_path, images_dir, pages=pages)
     print(f"Imágenes extraídas: {len(images_info)}")
 
     ocr_results = []
@@ -118,6 +133,7 @@ if __name__ == "__main__":
     parser.add_argument("--images-dir", "-d", default="data/images", help="Carpeta de salida para imágenes extraídas.")
     parser.add_argument("--output", "-o", required=True, help="Ruta del JSON de salida (resultados OCR).")
     parser.add_argument("--lang", default="eng", help="Idioma de OCR para Tesseract (ej: 'eng', 'spa').")
+    parser.add_argument("--pages", type=parse_page_ranges, default=None, help="Páginas a procesar, p.ej. '40-60,120' (por defecto todas).")
     args = parser.parse_args()
 
-    extract_ocr_from_pdf_images(args.input, args.images_dir, args.output, lang=args.lang)
+    extract_ocr_from_pdf_images(args.input, args.images_dir, args.output, lang=args.lang, pages=args.pages)
@@ -4,11 +4,19 @@ builder.py
 
 Reconstruye un PDF traducido usando el JSON de bloques traducidos y el PDF original.
 Clona cada página del PDF original y sobrepone el texto traducido en su posición original.
+Permite reconstruir solo un rango de páginas o parchearlas en un PDF traducido existente.
 """
 
 import fitz  # PyMuPDF
 import json
 import os
+import sys
+from typing import Optional, Iterable
+
+if __package__ in (None, ""):
+    # Ejecutado como script: agregar 'src' al path para poder importar 'utils'
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.utils import parse_page_ranges, select_pages
 
 
 def adjust_font_size(page, bbox, text, fontname, initial_size):
@@ -40,68 +48,139 @@ def adjust_font_size(page, bbox, text, fontname, initial_size):
     return min_size
 
 
-def reconstruct_pdf(json_path: str, pdf_original: str, pdf_output: str):
+def overlay_translated_page(page, page_info: dict):
+    """
+    Cubre el texto original de una página y sobrepone los bloques traducidos en su posición.
+
+    Args:
+        page: Objeto página de PyMuPDF donde escribir.
+        page_info (dict): Página del JSON traducido, con su lista de 'blocks'.
+    """
+    for block in page_info.get("blocks", []):
+        text = block.get("translated", "").strip()
+        if not text:
+            continue  # Omitir bloques vacíos
+
+        bbox = block.get("bbox", [0, 0, 0, 0])
+        font = block.get("font", "Times-Roman")
+        size = block.get("size", 12)
+
+        # Verificar fuente disponible; si falla usar Times-Roman
+        try:
+            fitz.Font(font)  # type: ignore
+            fontname = font
+        except Exception:
+            fontname = "Times-Roman"
+
+        # Ajustar tamaño de fuente si es necesario
+        fontsize = adjust_font_size(page, bbox, text, fontname, size)
+
+        # Cubrir el texto original con un rectángulo blanco
+        page.draw_rect(bbox, fill=(1, 1, 1), color=(1, 1, 1))  # type: ignore
+        # Insertar el texto traducido encima
+        page.insert_textbox(
+            bbox,
+            text,
+            fontname=fontname,
+            fontsize=fontsize,
+            color=(0, 0, 0),
+            align=fitz.TEXT_ALIGN_LEFT,
+            overlay=True
+        )  # type: ignore
+
+
+def reconstruct_pdf(json_path: str, pdf_original: str, pdf_output: str,
+                    pages: Optional[Iterable[int]] = None, base_pdf: Optional[str] = None):
     """
     Reconstruye el PDF traducido:
-    1. Clona todas las páginas del PDF original en un nuevo documento.
+    1. Clona las páginas del PDF original en un nuevo documento.
     2. Para cada página clonada, cubre el texto original y sobrepone el texto traducido.
 
+    Las páginas del JSON se ubican por su clave 'number' (1-indexada), por lo que el JSON puede
+    cubrir solo una parte del libro. Modos de salida:
+    - Sin 'pages' ni 'base_pdf': se clona el libro completo y se traducen las páginas presentes en el JSON.
+    - Con 'pages': se emiten únicamente las páginas seleccionadas (vista previa).
+    - Con 'base_pdf': se parte de un PDF traducido existente y se reemplazan en él las páginas
+      seleccionadas (o todas las del JSON) por su nueva traducción; las seleccionadas que no
+      figuran en el JSON se conservan tal como están en el PDF base.
+
     Args:
         json_path (str): Ruta al JSON con los bloques traducidos.
         pdf_original (str): Ruta al PDF original en inglés.
         pdf_output (str): Ruta donde se guardará el PDF traducido.
+        pages (Iterable[int], opcional): Números de página (1-indexados) a reconstruir.
+        base_pdf (str, opcional): PDF traducido existente en el que parchear las páginas.
     """
     # Cargar datos traducidos
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
+    # Indexar las páginas del JSON por número (compatibilidad: posición + 1 si falta 'number')
+    pages_by_number = {
+        page_info.get("number", idx + 1): page_info
+        for idx, page_info in enumerate(data.get("pages", []))
+    }
+
     # Abrir documentos
     doc_original: fitz.Document = fitz.open(pdf_original)  # type: ignore
-    doc_nuevo: fitz.Document = fitz.open()  # type: ignore
-
-    # Clonar todas las páginas de doc_original en doc_nuevo
-    doc_nuevo.insert_pdf(doc_original)  # type: ignore
-
-    # Recorrer cada página y superponer texto traducido
-    for idx, page_info in enumerate(data.get("pages", [])):
-        page: fitz.Page = doc_nuevo[idx]  # type: ignore
-        for block in page_info.get("blocks", []):
-            text = block.get("translated", "").strip()
-            if not text:
-                continue  # Omitir bloques vacíos
-
-            bbox = block.get("bbox", [0, 0, 0, 0])
-            font = block.get("font", "Times-Roman")
-            size = block.get("size", 12)
-
-            # Verificar fuente disponible; si falla usar Times-Roman
-            try:
-                fitz.Font(font)  # type: ignore
-                fontname = font
-            except Exception:
-                fontname = "Times-Roman"
-
-            # Ajustar tamaño de fuente si es necesario
-            fontsize = adjust_font_size(page, bbox, text, fontname, size)
-
-            # Cubrir el texto original con un rectángulo blanco
-            page.draw_rect(bbox, fill=(1, 1, 1), color=(1, 1, 1))  # type: ignore
-            # Insertar el texto traducido encima
-            page.insert_textbox(
-                bbox,
-                text,
-                fontname=fontname,
-                fontsize=fontsize,
-                color=(0, 0, 0),
-                align=fitz.TEXT_ALIGN_LEFT,
-                overlay=True
-            )  # type: ignore
-
-    # Guardar y cerrar
-    os.makedirs(os.path.dirname(pdf_output), exist_ok=True)
-    doc_nuevo.save(pdf_output)
+    try:
+        if pages is not None:
+            page_numbers = select_pages(pages, len(doc_original))
+        else:
+            page_numbers = select_pages(sorted(pages_by_number), len(doc_original))
+    except ValueError:
+        doc_original.close()
+        raise
+
+    if base_pdf is not None:
+        # Solo se parchean las páginas con traducción en el JSON: las demás conservan la del PDF base
+        skipped = [number for number in page_numbers if number not in pages_by_number]
+        if skipped:
+            print(f"Páginas sin traducción en el JSON, se conservan del PDF base: {skipped}")
+        page_numbers = [number for number in page_numbers if number in pages_by_number]
+        # Parchear un PDF traducido existente: sustituir cada página por una copia limpia del original
+        doc_nuevo: fitz.Document = fitz.open(base_pdf)  # type: ignore
+        if len(doc_nuevo) != len(doc_original):
+            doc_nuevo.close()
+            doc_original.close()
+            raise ValueError(
+                f"El PDF base tiene {len(doc_nuevo)} páginas y el original {len(doc_original)}; no se puede parchear."
+            )
+        for number in page_numbers:
+            doc_nuevo.delete_page(number - 1)  # type: ignore
+            doc_nuevo.insert_pdf(doc_original, from_page=number - 1, to_page=number - 1, start_at=number - 1)  # type: ignore
+        target_index = {number: number - 1 for number in page_numbers}
+    elif pages is not None:
+        # Vista previa: clonar solo las páginas seleccionadas, en orden
+        doc_nuevo = fitz.open()  # type: ignore
+        for number in page_numbers:
+            doc_nuevo.insert_pdf(doc_original, from_page=number - 1, to_page=number - 1)  # type: ignore
+        target_index = {number: position for position, number in enumerate(page_numbers)}
+    else:
+        # Clonar todas las páginas de doc_original en doc_nuevo
+        doc_nuevo = fitz.open()  # type: ignore
+        doc_nuevo.insert_pdf(doc_original)  # type: ignore
+        target_index = {number: number - 1 for number in page_numbers}
+
+    # Recorrer cada página seleccionada y superponer texto traducido
+    for number in page_numbers:
+        page_info = pages_by_number.get(number)
+        if page_info is None:
+            continue  # Página sin traducción en el JSON: se deja como en el original
+        page: fitz.Page = doc_nuevo[target_index[number]]  # type: ignore
+        overlay_translated_page(page, page_info)
+
+    # Guardar y cerrar (a un archivo temporal si se sobrescribe el PDF base)
+    output_dir = os.path.dirname(pdf_output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    overwrite_base = base_pdf is not None and os.path.abspath(base_pdf) == os.path.abspath(pdf_output)
+    save_path = pdf_output + ".tmp" if overwrite_base else pdf_output
+    doc_nuevo.save(save_path, garbage=3 if base_pdf is not None else 0)
     doc_nuevo.close()
     doc_original.close()
+    if overwrite_base:
+        os.replace(save_path, pdf_output)
     print(f"Reconstrucción completada. PDF traducido guardado en: {pdf_output}")
 
 
@@ -114,6 +193,8 @@ if __name__ == "__main__":
     parser.add_argument("--json", "-j", required=True, help="Ruta al JSON con bloques traducidos.")
     parser.add_argument("--original", "-i", required=True, help="Ruta al PDF original.")
     parser.add_argument("--output", "-o", required=True, help="Ruta para el PDF traducido.")
+    parser.add_argument("--pages", type=parse_page_ranges, default=None, help="Páginas a reconstruir, p.ej. '40-60,120' (por defecto las del JSON).")
+    parser.add_argument("--patch", default=None, help="PDF traducido existente en el que reemplazar las páginas indicadas.")
     args = parser.parse_args()
 
-    reconstruct_pdf(args.json, args.original, args.output)
+    reconstruct_pdf(args.json, args.original, args.output, pages=args.pages, base_pdf=args.patch)
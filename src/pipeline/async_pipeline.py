@@ -0,0 +1,322 @@
+"""
+async_pipeline.py
+
+Orquestación asíncrona de extracción y traducción para libros mixtos (páginas escaneadas y digitales).
+El OCR se ejecuta como subprocesos asíncronos de Tesseract limitados por un semáforo, que también
+limita las páginas renderizadas en memoria. Las páginas digitales pasan a traducción de inmediato
+y la traducción corre en un executor alimentado desde una cola asíncrona. Así el modelo de
+traducción trabaja mientras Tesseract reconoce páginas escaneadas, y el tiempo total se acerca
+al máximo de ambos en lugar de a su suma.
+"""
+import asyncio  # Bucle de eventos, subprocesos asíncronos, colas y semáforos
+import io       # Para codificar imágenes en memoria antes de enviarlas a Tesseract
+import time     # Medición de tiempos para el desglose final
+from concurrent.futures import ThreadPoolExecutor  # Executor donde corre el modelo de traducción
+from functools import partial  # Para pasar argumentos con nombre al executor
+from typing import List, Dict, Any, Optional, Iterable, Tuple  # Tipos para anotaciones
+
+import fitz  # PyMuPDF para abrir el PDF
+import pytesseract  # Solo para reutilizar la ruta configurada del ejecutable y su excepción
+
+from extract.extractor import extract_digital_blocks, get_ocr_targets, make_ocr_block
+from translate.translator import translate_blocks
+from utils.utils import select_pages
+
+
+class _StageTimer:
+    """
+    Mide el tiempo de una etapa del pipeline.
+    'busy' es el tiempo de reloj con al menos una tarea activa (unión de intervalos) y 'summed'
+    la suma de la duración de cada tarea, que es lo que costarían ejecutadas una tras otra.
+    Cada temporizador se usa desde un único hilo, por lo que no necesita bloqueo.
+    """
+
+    def __init__(self):
+        self.active = 0       # Tareas en curso
+        self.started = 0.0    # Momento en que la etapa pasó de inactiva a activa
+        self.busy = 0.0       # Segundos de reloj con la etapa activa
+        self.summed = 0.0     # Suma de la duración de cada tarea
+        self.calls = 0        # Número de tareas completadas
+
+    def start(self) -> float:
+        now = time.perf_counter()
+        if self.active == 0:
+            self.started = now
+        self.active += 1
+        return now
+
+    def stop(self, task_started: float):
+        now = time.perf_counter()
+        self.active -= 1
+        self.calls += 1
+        self.summed += now - task_started
+        if self.active == 0:
+            self.busy += now - self.started
+
+
+def _run_timed(timer: _StageTimer, func, *args, **kwargs):
+    """Ejecuta func (dentro de un executor) midiendo su duración con el temporizador indicado."""
+    task_started = timer.start()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timer.stop(task_started)
+
+
+def _read_digital_page(doc: fitz.Document, page_index: int) -> Tuple[List[dict], bool]:
+    """Extrae el texto digital de una página (se ejecuta en el hilo dedicado a PyMuPDF)."""
+    return extract_digital_blocks(doc[page_index])
+
+
+def _render_ocr_images(doc: fitz.Document, page_index: int) -> List[Tuple[bytes, list]]:
+    """
+    Obtiene las imágenes a reconocer de una página escaneada y las codifica como PNG
+    (se ejecuta en el hilo dedicado a PyMuPDF, fuera del bucle de eventos).
+
+    Returns:
+        List[Tuple[bytes, list]]: Pares (PNG codificado, bbox) listos para Tesseract.
+    """
+    encoded = []
+    for image, image_bbox in get_ocr_targets(doc, doc[page_index]):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        encoded.append((buffer.getvalue(), image_bbox))
+    return encoded
+
+
+async def ocr_image_async(image_bytes: bytes, lang: str = "eng") -> str:
+    """
+    Aplica OCR a una imagen lanzando Tesseract como subproceso asíncrono.
+
+    Args:
+        image_bytes (bytes): Imagen codificada (p.ej. PNG) que se envía por la entrada estándar.
+        lang (str): Idioma para el OCR (por defecto inglés).
+
+    Returns:
+        str: Texto reconocido, sin espacios en los extremos.
+
+    Raises:
+        pytesseract.TesseractError: Si Tesseract termina con error.
+    """
+    process = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", lang,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate(image_bytes)
+    except asyncio.CancelledError:
+        # Si se cancela el OCR (p.ej. porque falló la traducción), no dejar Tesseract en ejecución
+        process.kill()
+        await process.wait()
+        raise
+    if process.returncode != 0:
+        raise pytesseract.TesseractError(process.returncode, stderr.decode("utf-8", errors="replace").strip())
+    return stdout.decode("utf-8", errors="replace").strip()
+
+
+async def _ocr_page(page_data: Dict[str, Any], doc: fitz.Document, pdf_executor: ThreadPoolExecutor,
+                    semaphore: asyncio.Semaphore, queue: asyncio.Queue,
+                    pdf_timer: _StageTimer, ocr_timer: _StageTimer):
+    """
+    Renderiza y reconoce una página escaneada y la encola para traducción al terminar.
+    El semáforo se toma antes de renderizar, así que solo hay en memoria las imágenes
+    de las páginas que están en OCR en ese momento.
+
+    Args:
+        page_data (Dict): Página del resultado, a la que se añaden los bloques OCR.
+        doc (fitz.Document): Documento abierto (solo se usa desde pdf_executor).
+        pdf_executor (ThreadPoolExecutor): Hilo único dedicado a PyMuPDF.
+        semaphore (asyncio.Semaphore): Semáforo que limita las páginas en OCR simultáneas.
+        queue (asyncio.Queue): Cola de páginas listas para traducir.
+        pdf_timer (_StageTimer): Tiempo de lectura, renderizado y codificación.
+        ocr_timer (_StageTimer): Tiempo de los subprocesos de Tesseract.
+    """
+    loop = asyncio.get_running_loop()
+    async with semaphore:
+        images = await loop.run_in_executor(
+            pdf_executor, partial(_run_timed, pdf_timer, _render_ocr_images, doc, page_data["number"] - 1)
+        )
+        for image_bytes, image_bbox in images:
+            task_started = ocr_timer.start()
+            try:
+                ocr_text = await ocr_image_async(image_bytes)
+            finally:
+                ocr_timer.stop(task_started)
+            if ocr_text:
+                page_data["blocks"].append(make_ocr_block(ocr_text, image_bbox))
+    await queue.put(page_data)
+
+
+async def _translation_worker(queue: asyncio.Queue, translation_pipeline, executor: ThreadPoolExecutor,
+                              translation_timer: _StageTimer, batch_size: int,
+                              masking_pattern, glossary: Optional[Dict[str, str]]):
+    """
+    Consume páginas de la cola y las traduce en el executor hasta recibir el centinela None.
+    Las páginas que ya esperan en la cola se agrupan en una sola llamada para llenar los lotes.
+
+    Args:
+        queue (asyncio.Queue): Cola de páginas listas para traducir (None indica fin).
+        translation_pipeline: Pipeline de traducción cargado.
+        executor (ThreadPoolExecutor): Executor donde se ejecuta el modelo.
+        translation_timer (_StageTimer): Tiempo de traducción.
+        batch_size (int): Tamaño de lote para traducción.
+        masking_pattern: Patrón de enmascarado compilado (ver translate_blocks).
+        glossary (Dict[str, str], opcional): Glosario usado al compilar el patrón.
+    """
+    loop = asyncio.get_running_loop()
+    finished = False
+    while not finished:
+        # Esperar la siguiente página y recoger sin bloquear las que ya estén listas
+        ready = [await queue.get()]
+        while not queue.empty():
+            ready.append(queue.get_nowait())
+        if ready[-1] is None:
+            finished = True
+            ready.pop()
+        if not ready:
+            continue
+        # Los bloques son los mismos diccionarios de cada página, así que se traducen en su lugar
+        blocks = [block for page_data in ready for block in page_data["blocks"]]
+        await loop.run_in_executor(executor, partial(
+            _run_timed, translation_timer, translate_blocks, blocks, translation_pipeline,
+            batch_size=batch_size, masking_pattern=masking_pattern, glossary=glossary
+        ))
+
+
+async def extract_and_translate_async(pdf_path: str, translation_pipeline, batch_size: int = 16,
+                                      pages: Optional[Iterable[int]] = None, ocr_concurrency: int = 4,
+                                      masking_pattern=None,
+                                      glossary: Optional[Dict[str, str]] = None) -> Tuple[dict, Dict[str, Any]]:
+    """
+    Extrae y traduce un PDF solapando el OCR de páginas escaneadas con la traducción de las demás.
+
+    Args:
+        pdf_path (str): Ruta al PDF de entrada.
+        translation_pipeline: Pipeline de traducción cargado.
+        batch_size (int): Tamaño de lote para traducción.
+        pages (Iterable[int], opcional): Números de página (1-indexados) a procesar; por defecto todas.
+        ocr_concurrency (int): Máximo de páginas en OCR (y procesos de Tesseract) simultáneos; al menos 1.
+        masking_pattern: Patrón de enmascarado compilado (ver translate_blocks).
+        glossary (Dict[str, str], opcional): Glosario usado al compilar el patrón.
+
+    Returns:
+        Tuple[dict, Dict[str, Any]]: Datos con la misma estructura que extract_text, con la clave
+        'translated' en cada bloque, y el desglose de tiempos (ver format_timings).
+
+    Raises:
+        ValueError: Si ocr_concurrency es menor que 1 o alguna página queda fuera del documento.
+    """
+    # Con un semáforo de 0 la primera página escaneada esperaría para siempre
+    if ocr_concurrency < 1:
+        raise ValueError(f"ocr_concurrency debe ser al menos 1 (se recibió {ocr_concurrency})")
+    wall_start = time.perf_counter()
+    pdf_timer = _StageTimer()
+    ocr_timer = _StageTimer()
+    translation_timer = _StageTimer()
+    semaphore = asyncio.Semaphore(ocr_concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    result: Dict[str, Any] = {"pages": []}
+    loop = asyncio.get_running_loop()
+
+    doc: fitz.Document = fitz.open(pdf_path)
+    # PyMuPDF no es seguro entre hilos: todo acceso al documento pasa por este único hilo
+    pdf_executor = ThreadPoolExecutor(max_workers=1)
+    # Un único hilo para el modelo: el pipeline de HuggingFace no debe usarse desde varios hilos a la vez
+    translation_executor = ThreadPoolExecutor(max_workers=1)
+    worker = asyncio.create_task(_translation_worker(
+        queue, translation_pipeline, translation_executor, translation_timer, batch_size, masking_pattern, glossary
+    ))
+    ocr_tasks = []
+
+    async def _produce():
+        """Lee cada página: las digitales van a la cola y las escaneadas a una tarea de OCR."""
+        for number in select_pages(pages, len(doc)):
+            blocks, has_digital_text = await loop.run_in_executor(
+                pdf_executor, partial(_run_timed, pdf_timer, _read_digital_page, doc, number - 1)
+            )
+            page_data = {"number": number, "blocks": blocks}
+            result["pages"].append(page_data)
+            if has_digital_text:
+                # Página digital: pasa a traducción sin esperar a las escaneadas anteriores
+                await queue.put(page_data)
+            else:
+                # Página escaneada: se renderiza y reconoce cuando haya un hueco en el semáforo
+                ocr_tasks.append(asyncio.create_task(
+                    _ocr_page(page_data, doc, pdf_executor, semaphore, queue, pdf_timer, ocr_timer)
+                ))
+        await asyncio.gather(*ocr_tasks)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        # Vigilar a la vez la lectura/OCR y la traducción: el consumidor solo termina antes que
+        # el productor si falló, y en ese caso el error se propaga sin esperar al OCR pendiente
+        done, _ = await asyncio.wait({producer, worker}, return_when=asyncio.FIRST_COMPLETED)
+        if worker in done:
+            worker.result()
+        producer.result()
+        # Indicar al consumidor que no habrá más páginas y esperar a que termine
+        await queue.put(None)
+        await worker
+    finally:
+        # Ante un error, cancelar lo pendiente (no tiene efecto sobre tareas ya terminadas)
+        producer.cancel()
+        for task in ocr_tasks:
+            task.cancel()
+        worker.cancel()
+        await asyncio.gather(producer, *ocr_tasks, worker, return_exceptions=True)
+        # Cerrar el documento solo cuando ningún trabajo de PyMuPDF pueda seguir en curso
+        pdf_executor.shutdown(wait=True)
+        doc.close()
+        translation_executor.shutdown(wait=True)
+
+    timings = {
+        "pages": len(result["pages"]),
+        "scanned_pages": len(ocr_tasks),
+        "pdf_seconds": pdf_timer.summed,
+        "ocr_calls": ocr_timer.calls,
+        "ocr_busy_seconds": ocr_timer.busy,
+        "ocr_summed_seconds": ocr_timer.summed,
+        "translation_batches": translation_timer.calls,
+        "translation_seconds": translation_timer.summed,
+        "wall_seconds": time.perf_counter() - wall_start,
+    }
+    return result, timings
+
+
+def format_timings(timings: Dict[str, Any]) -> str:
+    """
+    Genera un desglose legible de tiempos que compara el tiempo real con una estimación secuencial.
+
+    La estimación secuencial suma la lectura/renderizado del PDF, la duración de cada llamada a
+    Tesseract y la traducción, que es lo que el flujo secuencial ejecuta una tras otra. Supone que
+    cada llamada a Tesseract dura lo mismo sin concurrencia, por lo que con varios procesos
+    compitiendo por la CPU tiende a sobrestimarse; para una comparación exacta, ejecutar main.py sin --overlap.
+
+    Args:
+        timings (Dict[str, Any]): Tiempos devueltos por extract_and_translate_async.
+
+    Returns:
+        str: Texto con el tiempo de cada etapa, la estimación secuencial y el tiempo real.
+    """
+    pdf = timings["pdf_seconds"]
+    ocr_busy = timings["ocr_busy_seconds"]
+    ocr_summed = timings["ocr_summed_seconds"]
+    translation = timings["translation_seconds"]
+    wall = timings["wall_seconds"]
+    sequential = pdf + ocr_summed + translation
+    slowest = max(pdf, ocr_busy, translation)
+    lines = [
+        f"   Páginas: {timings['pages']} ({timings['scanned_pages']} escaneadas)",
+        f"   Lectura/render PDF:            {pdf:8.2f} s",
+        f"   OCR, suma de llamadas:         {ocr_summed:8.2f} s ({timings['ocr_calls']} imágenes)",
+        f"   OCR, tiempo de reloj activo:   {ocr_busy:8.2f} s",
+        f"   Traducción:                    {translation:8.2f} s ({timings['translation_batches']} llamadas)",
+        f"   Estimación secuencial:         {sequential:8.2f} s (lectura + suma OCR + traducción)",
+        f"   Etapa más lenta (límite):      {slowest:8.2f} s",
+        f"   Tiempo real:                   {wall:8.2f} s",
+    ]
+    if sequential > 0:
+        lines.append(f"   Ahorro frente a la estimación: {(1 - wall / sequential) * 100:7.1f} %")
+    return "\n".join(lines)
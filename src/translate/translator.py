@@ -2,13 +2,19 @@
 translator.py
 
 Módulo para traducir textos del inglés al español utilizando el modelo de traducción de HuggingFace.
-Incluye filtrado de bloques no traductibles (p.ej., solo símbolos o ecuaciones) y una barra de progreso para el proceso de traducción.
+Incluye filtrado de bloques no traductibles (p.ej., solo símbolos o ecuaciones), enmascarado de
+contenido protegido dentro de cada bloque (URLs, código, fórmulas, citas, números y términos de glosario)
+y una barra de progreso para el proceso de traducción.
 """
 from transformers import pipeline  # Cargar el pipeline de traducción de HuggingFace
-from typing import List, Dict, Any  # Tipos para anotaciones (listas, diccionarios, etc.)
+from typing import List, Dict, Any, Optional, Tuple, Iterable  # Tipos para anotaciones (listas, diccionarios, etc.)
+import json     # Para cargar glosarios en formato JSON
+import logging  # Avisos cuando el modelo pierde marcadores
 import re       # Expresiones regulares para detectar patrones de texto
 from tqdm import tqdm  # Barra de progreso para iteraciones largas
 
+logger = logging.getLogger(__name__)
+
 def load_translation_pipeline(model_name: str = "Helsinki-NLP/opus-mt-en-es", device: int = -1):
     """
     Carga y devuelve un pipeline de traducción inglés->español usando HuggingFace.
@@ -56,6 +62,192 @@ def is_translatable(text: str) -> bool:
     # Si contiene letras y al menos una pareja de letras consecutivas, consideramos que es un texto traducible
     return True
 
+# Patrones de contenido en línea que nunca debe pasar por el modelo de traducción.
+# El orden importa: ante dos coincidencias en la misma posición gana la primera alternativa.
+PROTECTED_PATTERNS: List[str] = [
+    r"`[^`\n]+`",                                           # Código en línea entre comillas invertidas
+    r"\$[^\s$](?:[^$\n]*[^\s$])?\$(?!\d)",                  # Fórmulas en línea estilo LaTeX ($x^2$), no importes ($5 y $10)
+    r"\\\(.+?\\\)",                                         # Fórmulas en línea estilo LaTeX (\(...\))
+    r"(?:https?|ftp)://[^\s<>\"]*[^\s<>\".,;:!?)\]]",       # URLs con esquema
+    r"www\.[^\s<>\"]*[^\s<>\".,;:!?)\]]",                   # URLs sin esquema
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",                        # Correos electrónicos
+    r"\[\d+(?:\s*[,–-]\s*\d+)*\]",                          # Citas numéricas: [3], [1, 4], [2-5]
+    r"\b[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+\(\)",               # Llamadas con puntos: os.path.join()
+    r"\b(?=[\w.]*_)[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+",        # Identificadores con puntos y '_': self.max_len
+    r"\b[A-Za-z_]\w*\(\)",                                  # Llamadas a funciones: main()
+    r"\b[a-z][a-z0-9]*(?:_[a-z0-9]+)+\b",                   # Identificadores snake_case
+    r"\b[a-z]+(?:[A-Z][a-z0-9]*)+\b",                       # Identificadores camelCase
+    r"(?<![\w.])\d+(?:[.,]\d+)*%?(?!\w)",                   # Números (enteros, decimales, porcentajes)
+]
+
+# Formato de los marcadores que sustituyen al contenido protegido antes de traducir.
+# Se usan dobles corchetes con un índice para que sean cortos y el modelo los copie tal cual.
+PLACEHOLDER_TEMPLATE = "[[{}]]"
+# Expresión tolerante para recuperar marcadores aunque el modelo inserte espacios en ellos
+PLACEHOLDER_REGEX = re.compile(r"\[\s*\[\s*(\d+)\s*\]\s*\]")
+
+def _trie_to_regex(node: Dict[str, Any]) -> str:
+    """
+    Convierte recursivamente un trie de caracteres en una expresión regular sin retroceso innecesario.
+    Los prefijos comunes se factorizan, de modo que el coste de buscar no depende del número de términos.
+
+    Args:
+        node (Dict): Nodo del trie; cada clave es un carácter y la clave vacía '' marca fin de término.
+
+    Returns:
+        str: Fragmento de expresión regular equivalente al sub-trie.
+    """
+    alternatives = [re.escape(char) + _trie_to_regex(child)
+                    for char, child in sorted(node.items()) if char != ""]
+    # Un nodo hoja (solo marca de fin) no agrega nada al patrón
+    if not alternatives:
+        return ""
+    is_optional = "" in node
+    if len(alternatives) == 1 and not is_optional:
+        return alternatives[0]
+    body = "(?:" + "|".join(alternatives) + ")"
+    # Si un término termina aquí, el resto es opcional (el cuantificador codicioso prefiere el término más largo)
+    return body + "?" if is_optional else body
+
+def build_glossary_regex(terms: Iterable[str]) -> str:
+    """
+    Construye una única expresión regular que reconoce cualquiera de los términos de un glosario.
+    Los términos se insertan en un trie para que el patrón escale a decenas de miles de entradas.
+
+    Args:
+        terms (Iterable[str]): Términos del glosario a reconocer (sensibles a mayúsculas).
+
+    Returns:
+        str: Patrón de expresión regular, o cadena vacía si no hay términos.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        if not term:
+            continue
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Marca de fin de término
+    if not trie:
+        return ""
+    # Exigir que el término no esté pegado a otras letras o dígitos (coincidencia de palabra completa)
+    return r"(?<!\w)" + _trie_to_regex(trie) + r"(?!\w)"
+
+def build_masking_pattern(glossary: Optional[Dict[str, str]] = None,
+                          protected_patterns: Optional[List[str]] = None) -> "re.Pattern[str]":
+    """
+    Compila en una sola expresión regular los términos del glosario y los patrones protegidos,
+    para localizar todo el contenido a enmascarar de un bloque en una única pasada.
+
+    Args:
+        glossary (Dict[str, str], opcional): Glosario término original -> texto a restaurar tras traducir.
+        protected_patterns (List[str], opcional): Patrones protegidos; por defecto PROTECTED_PATTERNS.
+
+    Returns:
+        re.Pattern: Patrón compilado con los grupos 'glossary' y 'protected'.
+    """
+    if protected_patterns is None:
+        protected_patterns = PROTECTED_PATTERNS
+    parts = []
+    # Los términos del glosario tienen prioridad sobre los patrones genéricos
+    glossary_regex = build_glossary_regex(glossary.keys()) if glossary else ""
+    if glossary_regex:
+        parts.append(f"(?P<glossary>{glossary_regex})")
+    if protected_patterns:
+        parts.append("(?P<protected>" + "|".join(f"(?:{p})" for p in protected_patterns) + ")")
+    # Sin nada que proteger, usar un patrón que nunca coincide
+    return re.compile("|".join(parts) if parts else r"(?!)")
+
+def load_glossary(path: str) -> Dict[str, str]:
+    """
+    Carga un glosario desde un archivo JSON.
+    Acepta un objeto {término: traducción} o una lista de términos que deben conservarse sin traducir.
+
+    Args:
+        path (str): Ruta al archivo JSON del glosario.
+
+    Returns:
+        Dict[str, str]: Glosario término original -> texto que debe aparecer en la traducción.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # Una lista de términos equivale a protegerlos tal cual
+    if isinstance(data, list):
+        return {str(term): str(term) for term in data}
+    return {str(term): str(value) for term, value in data.items()}
+
+def mask_text(text: str, masking_pattern: "re.Pattern[str]",
+              glossary: Optional[Dict[str, str]] = None,
+              glossary_only: bool = False) -> Tuple[str, List[str]]:
+    """
+    Sustituye el contenido protegido y los términos de glosario de un texto por marcadores compactos.
+
+    Args:
+        text (str): Texto original del bloque.
+        masking_pattern (re.Pattern): Patrón compilado con build_masking_pattern.
+        glossary (Dict[str, str], opcional): Glosario usado al compilar el patrón.
+        glossary_only (bool): Si es True, solo se enmascaran los términos del glosario y el
+            contenido protegido se deja en el texto.
+
+    Returns:
+        Tuple[str, List[str]]: Texto enmascarado y lista de reemplazos, donde el marcador i
+        debe restaurarse con el elemento i de la lista.
+    """
+    replacements: List[str] = []
+
+    def _replace(match: "re.Match[str]") -> str:
+        matched = match.group(0)
+        # Los términos de glosario se restauran con su traducción fija; el resto, tal cual
+        if glossary and match.lastgroup == "glossary":
+            replacements.append(glossary.get(matched, matched))
+        elif glossary_only:
+            return matched
+        else:
+            replacements.append(matched)
+        return PLACEHOLDER_TEMPLATE.format(len(replacements) - 1)
+
+    masked = masking_pattern.sub(_replace, text)
+    return masked, replacements
+
+def unmask_text(text: str, replacements: List[str]) -> str:
+    """
+    Restaura en un texto traducido el contenido original de cada marcador.
+
+    Args:
+        text (str): Texto traducido que contiene marcadores.
+        replacements (List[str]): Reemplazos devueltos por mask_text.
+
+    Returns:
+        str: Texto con los marcadores sustituidos por su contenido.
+    """
+    if not replacements:
+        return text
+
+    def _restore(match: "re.Match[str]") -> str:
+        index = int(match.group(1))
+        # Dejar intacto un marcador que el modelo haya inventado (índice fuera de rango)
+        return replacements[index] if index < len(replacements) else match.group(0)
+
+    return PLACEHOLDER_REGEX.sub(_restore, text)
+
+def missing_placeholders(text: str, replacements: List[str]) -> List[int]:
+    """
+    Indica qué marcadores de un texto enmascarado no aparecen en su traducción.
+    Si falta alguno, restaurar los marcadores perdería contenido protegido (p.ej. una URL).
+
+    Args:
+        text (str): Texto traducido que debería contener los marcadores.
+        replacements (List[str]): Reemplazos devueltos por mask_text.
+
+    Returns:
+        List[int]: Índices de los marcadores ausentes, en orden ascendente.
+    """
+    found = {int(index) for index in PLACEHOLDER_REGEX.findall(text)}
+    return [index for index in range(len(replacements)) if index not in found]
+
+# Patrón por defecto (sin glosario), compilado una sola vez al importar el módulo
+DEFAULT_MASKING_PATTERN = build_masking_pattern()
+
 def batch_translate_texts(texts: List[str], translation_pipeline, batch_size: int = 16) -> List[str]:
     """
     Traduce una lista de textos utilizando el pipeline de traducción en lotes (batch) para eficiencia.
@@ -79,42 +271,86 @@ def batch_translate_texts(texts: List[str], translation_pipeline, batch_size: in
             translated_texts.append(output['translation_text'])
     return translated_texts
 
-def translate_blocks(blocks: List[Dict[str, Any]], translation_pipeline, batch_size: int = 16) -> List[Dict[str, Any]]:
+def translate_blocks(blocks: List[Dict[str, Any]], translation_pipeline, batch_size: int = 16,
+                     masking_pattern: Optional["re.Pattern[str]"] = None,
+                     glossary: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
     """
     Traduce una lista de bloques de texto, omitiendo o copiando aquellos que no deban traducirse.
+    Antes de traducir, enmascara el contenido protegido (URLs, código, fórmulas, citas, números y
+    términos de glosario) y lo restaura después; los textos enmascarados idénticos se traducen una sola vez.
     Agrega la clave 'translated' en cada bloque con el texto traducido o el original si no se tradujo.
 
     Args:
         blocks (List[Dict]): Lista de bloques de texto, cada uno con al menos la clave 'text'.
         translation_pipeline: Objeto pipeline de traducción cargado.
         batch_size (int): Tamaño de lote para traducción en batch.
+        masking_pattern (re.Pattern, opcional): Patrón de build_masking_pattern; compilarlo una vez
+            y reutilizarlo entre páginas. Por defecto DEFAULT_MASKING_PATTERN.
+        glossary (Dict[str, str], opcional): Glosario usado al compilar masking_pattern.
 
     Returns:
         List[Dict]: La misma lista de bloques recibida, donde cada bloque ahora incluye la clave 'translated'.
     """
+    if masking_pattern is None:
+        # Compilar el glosario aquí solo como último recurso: es costoso si se repite por página
+        masking_pattern = build_masking_pattern(glossary) if glossary else DEFAULT_MASKING_PATTERN
+
     # Listas temporales para manejar la traducción por lotes
-    texts_to_translate = []   # Almacenará los textos que necesitan traducción
-    translate_indices = []    # Almacenará los índices de los bloques correspondientes a esos textos
+    texts_to_translate = []   # Textos enmascarados únicos que necesitan traducción
+    text_positions = {}       # Texto enmascarado -> posición en texts_to_translate
+    pending = []              # Tuplas (índice de bloque, posición del texto, reemplazos del marcado)
 
     # Recorrer todos los bloques de texto para decidir cuáles traducir
     for idx, block in enumerate(blocks):
         original_text = block.get('text', '')
-        # Decidir si este bloque se debe traducir usando la función de filtro
-        if not is_translatable(original_text):
-            # Si no es traducible (ej: solo símbolos), copiar el texto tal cual al campo 'translated'
-            block['translated'] = original_text
+        # Enmascarar el contenido protegido del texto (limpio)
+        masked_text, replacements = mask_text(original_text.strip(), masking_pattern, glossary)
+        # Decidir si este bloque se debe traducir evaluando solo lo que queda fuera de los marcadores
+        if not is_translatable(PLACEHOLDER_REGEX.sub(" ", masked_text)):
+            # Si no es traducible (ej: solo símbolos o solo una URL), conservar el texto con el glosario aplicado
+            block['translated'] = unmask_text(masked_text, replacements) if replacements else original_text
         else:
-            # Si es traducible, guardar el texto (limpio) para traducción
-            text_clean = original_text.strip()
-            texts_to_translate.append(text_clean)
-            translate_indices.append(idx)
+            # Reutilizar la traducción de un texto enmascarado idéntico (p.ej. "Figura [[0]]")
+            position = text_positions.get(masked_text)
+            if position is None:
+                position = len(texts_to_translate)
+                text_positions[masked_text] = position
+                texts_to_translate.append(masked_text)
+            pending.append((idx, position, replacements))
 
     # Realizar la traducción en lotes para todos los textos acumulados
     if texts_to_translate:
         translated_texts = batch_translate_texts(texts_to_translate, translation_pipeline, batch_size)
-        # Asignar cada traducción obtenida al bloque correspondiente usando los índices almacenados
-        for idx, translated_text in zip(translate_indices, translated_texts):
-            blocks[idx]['translated'] = translated_text
+        # Asignar cada traducción obtenida al bloque correspondiente, restaurando sus marcadores
+        fallback_indices = []  # Bloques cuya traducción perdió algún marcador
+        for idx, position, replacements in pending:
+            if missing_placeholders(translated_texts[position], replacements):
+                fallback_indices.append(idx)
+                continue
+            blocks[idx]['translated'] = unmask_text(translated_texts[position], replacements)
+
+        # Si el modelo perdió o reescribió marcadores, traducir esos bloques de nuevo enmascarando
+        # solo los términos del glosario, para no perder sus traducciones fijas
+        if fallback_indices:
+            logger.warning(
+                "El modelo perdió marcadores en %d bloque(s); se traducen de nuevo enmascarando solo el glosario.",
+                len(fallback_indices)
+            )
+            fallback_masks = [
+                mask_text(blocks[idx].get('text', '').strip(), masking_pattern, glossary, glossary_only=True)
+                for idx in fallback_indices
+            ]
+            fallback_texts = batch_translate_texts(
+                [masked_text for masked_text, _ in fallback_masks], translation_pipeline, batch_size
+            )
+            for idx, (_, replacements), translated_text in zip(fallback_indices, fallback_masks, fallback_texts):
+                missing = missing_placeholders(translated_text, replacements)
+                restored = unmask_text(translated_text, replacements)
+                if missing:
+                    # Último recurso: añadir al final los términos cuyo marcador volvió a perderse
+                    logger.warning("El modelo volvió a perder marcadores en el bloque %d.", idx)
+                    restored = " ".join([restored] + [replacements[index] for index in missing])
+                blocks[idx]['translated'] = restored
 
     # Devolver la lista de bloques, ahora con las traducciones agregadas
     return blocks
@@ -122,7 +358,13 @@ def translate_blocks(blocks: List[Dict[str, Any]], translation_pipeline, batch_s
 # Punto de entrada para ejecución desde la línea de comandos
 if __name__ == "__main__":
     import argparse  # Manejo de argumentos de línea de comandos
-    import json     # Para leer/escribir archivos JSON
+    import os       # Rutas para ubicar el paquete 'utils'
+    import sys      # Para ajustar el path de importación al ejecutar como script
+
+    if __package__ in (None, ""):
+        # Ejecutado como script: agregar 'src' al path para poder importar 'utils'
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.utils import parse_page_ranges, page_in_selection  # Selección de rangos de páginas
 
     # Definir los argumentos CLI disponibles
     parser = argparse.ArgumentParser(
@@ -133,6 +375,8 @@ if __name__ == "__main__":
     parser.add_argument("--model", default="Helsinki-NLP/opus-mt-en-es", help="Nombre del modelo de HuggingFace a utilizar.")
     parser.add_argument("--device", type=int, default=-1, help="Dispositivo para ejecutar la traducción: CPU (-1) o GPU (0).")
     parser.add_argument("--batch-size", type=int, default=16, help="Cantidad de textos a traducir por lote.")
+    parser.add_argument("--glossary", default=None, help="Ruta a un glosario JSON ({término: traducción} o lista de términos a conservar).")
+    parser.add_argument("--pages", type=parse_page_ranges, default=None, help="Páginas a traducir, p.ej. '40-60,120' (por defecto todas las del JSON).")
     args = parser.parse_args()
 
     # Cargar el contenido JSON de entrada (bloques a traducir)
@@ -141,12 +385,19 @@ if __name__ == "__main__":
 
     # Inicializar el pipeline de traducción con el modelo y dispositivo especificados
     translation_pipeline = load_translation_pipeline(model_name=args.model, device=args.device)
+    # Cargar el glosario (si se indicó) y compilar una sola vez el patrón de enmascarado
+    glossary = load_glossary(args.glossary) if args.glossary else None
+    masking_pattern = build_masking_pattern(glossary)
 
     # Traducir página por página, mostrando una barra de progreso en la consola
     pages = data.get('pages', [])
+    if args.pages is not None:
+        # Traducir solo las páginas seleccionadas; el resto se guarda sin cambios
+        pages = [page for page in pages if page_in_selection(page.get('number'), args.pages)]
     for page in tqdm(pages, desc="Traduciendo páginas", unit="página"):
         # Traducir los bloques de texto de la página actual
-        page['blocks'] = translate_blocks(page['blocks'], translation_pipeline, batch_size=args.batch_size)
+        page['blocks'] = translate_blocks(page['blocks'], translation_pipeline, batch_size=args.batch_size,
+                                          masking_pattern=masking_pattern, glossary=glossary)
 
     # Guardar los datos con las traducciones en el archivo JSON de salida
     with open(args.output, "w", encoding="utf-8") as f:
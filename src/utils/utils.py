@@ -0,0 +1,84 @@
+"""
+utils.py
+
+Funciones auxiliares compartidas por los distintos módulos del pipeline.
+"""
+from typing import List, Optional, Iterable, Union
+
+
+def parse_page_ranges(spec: str) -> List[range]:
+    """
+    Convierte una especificación de páginas como "40-60,120" en una lista de rangos de páginas.
+    Los números son 1-indexados, como en la clave 'number' del JSON de extracción. Los rangos no
+    se expanden aquí: select_pages los valida contra el documento antes de generar cada número,
+    de modo que un error como "1-50000000" falla de inmediato.
+
+    Args:
+        spec (str): Rangos separados por comas; cada elemento es "N" o "A-B" (ambos extremos incluidos).
+
+    Returns:
+        List[range]: Rangos de páginas en el orden indicado.
+
+    Raises:
+        ValueError: Si la especificación está vacía o contiene un rango mal formado.
+    """
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start_str, end_str = part.split("-", 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = end = int(part)
+        # Las páginas empiezan en 1 y el rango debe ser creciente
+        if start < 1 or end < start:
+            raise ValueError(f"Rango de páginas no válido: {part!r}")
+        ranges.append(range(start, end + 1))
+    if not ranges:
+        raise ValueError(f"Especificación de páginas vacía: {spec!r}")
+    return ranges
+
+
+def page_in_selection(number: int, pages: Iterable[Union[int, range]]) -> bool:
+    """
+    Indica si un número de página forma parte de una selección de páginas o rangos.
+
+    Args:
+        number (int): Número de página (1-indexado).
+        pages (Iterable[Union[int, range]]): Páginas sueltas o rangos, como los de parse_page_ranges.
+
+    Returns:
+        bool: True si la página está seleccionada.
+    """
+    return any(number in item if isinstance(item, range) else number == item for item in pages)
+
+
+def select_pages(pages: Optional[Iterable[Union[int, range]]], page_count: int) -> List[int]:
+    """
+    Valida una selección de páginas contra el total de páginas del documento.
+
+    Args:
+        pages (Iterable[Union[int, range]], opcional): Números de página (1-indexados) o rangos,
+            como los de parse_page_ranges; None selecciona todas.
+        page_count (int): Número total de páginas del documento.
+
+    Returns:
+        List[int]: Números de página seleccionados en orden ascendente.
+
+    Raises:
+        ValueError: Si alguna página queda fuera del documento.
+    """
+    if pages is None:
+        return list(range(1, page_count + 1))
+    ranges = [item if isinstance(item, range) else range(item, item + 1) for item in pages]
+    # Validar los extremos de cada rango antes de expandirlo
+    out_of_range = [
+        f"{item.start}-{item.stop - 1}" if len(item) > 1 else str(item.start)
+        for item in ranges
+        if len(item) and (item.start < 1 or item.stop - 1 > page_count)
+    ]
+    if out_of_range:
+        raise ValueError(f"Páginas fuera del documento ({page_count} páginas): {', '.join(out_of_range)}")
+    return sorted({number for item in ranges for number in item})
@@ -0,0 +1,45 @@
+"""
+conftest.py
+
+Configuración común de pytest: agrega 'src' al path para importar los módulos del proyecto
+igual que lo hace main.py, y define las utilidades de prueba compartidas.
+"""
+import os
+import sys
+
+import fitz
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def _fake_pipeline(batch):
+    """Pipeline de traducción de prueba: antepone 'ES ' a cada texto sin tocar sus marcadores."""
+    return [{"translation_text": f"ES {text}"} for text in batch]
+
+
+@pytest.fixture
+def fake_pipeline():
+    """Pipeline de traducción de prueba compartido por los módulos de pruebas."""
+    return _fake_pipeline
+
+
+def _make_pdf(path, page_count, scanned_pages=()):
+    """
+    Genera un PDF con el texto digital 'Page N' en cada página.
+    Las páginas de 'scanned_pages' quedan sin texto digital, como una página escaneada.
+    """
+    doc = fitz.open()
+    for number in range(1, page_count + 1):
+        page = doc.new_page()
+        if number not in scanned_pages:
+            page.insert_text((72, 72), f"Page {number}", fontsize=12)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def make_pdf():
+    """Generador de PDFs de prueba: make_pdf(path, page_count, scanned_pages=())."""
+    return _make_pdf
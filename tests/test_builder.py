@@ -0,0 +1,92 @@
+"""
+Pruebas de la reconstrucción del PDF: libro completo, vista previa por páginas y parcheo.
+"""
+import json
+
+import fitz
+import pytest
+
+from pdfbuilder.builder import reconstruct_pdf
+from utils.utils import parse_page_ranges
+
+
+def make_translated_json(json_path, translations):
+    """Escribe un JSON traducido con un bloque sobre 'Page N' para cada página de 'translations'."""
+    pages = [
+        {"number": number, "blocks": [{
+            # BBox holgado alrededor de 'Page N' para que el texto traducido quepa en altura
+            "text": f"Page {number}", "bbox": [60, 50, 300, 100], "font": "Helvetica",
+            "size": 12, "translated": translated,
+        }]}
+        for number, translated in translations.items()
+    ]
+    json_path.write_text(json.dumps({"pages": pages}), encoding="utf-8")
+
+
+def page_texts(pdf_path):
+    doc = fitz.open(str(pdf_path))
+    texts = [page.get_text() for page in doc]
+    doc.close()
+    return texts
+
+
+@pytest.fixture
+def original(tmp_path, make_pdf):
+    return make_pdf(tmp_path / "original.pdf", 5)
+
+
+def test_full_book_uses_page_numbers_from_json(tmp_path, original):
+    json_path = tmp_path / "translated.json"
+    make_translated_json(json_path, {3: "Hoja 3"})
+    output = tmp_path / "out" / "book.pdf"
+    reconstruct_pdf(str(json_path), str(original), str(output))
+    texts = page_texts(output)
+    assert len(texts) == 5
+    assert "Hoja 3" in texts[2]
+    assert "Hoja" not in texts[0]
+
+
+def test_preview_emits_only_selected_pages(tmp_path, original):
+    json_path = tmp_path / "translated.json"
+    make_translated_json(json_path, {2: "Hoja 2", 4: "Hoja 4"})
+    output = tmp_path / "preview.pdf"
+    reconstruct_pdf(str(json_path), str(original), str(output), pages=parse_page_ranges("2,4"))
+    texts = page_texts(output)
+    assert len(texts) == 2
+    assert "Hoja 2" in texts[0]
+    assert "Hoja 4" in texts[1]
+
+
+def test_patch_replaces_selected_pages_and_keeps_the_rest(tmp_path, original):
+    full_json = tmp_path / "full.json"
+    make_translated_json(full_json, {n: f"Hoja {n}" for n in range(1, 6)})
+    book = tmp_path / "book.pdf"
+    reconstruct_pdf(str(full_json), str(original), str(book))
+
+    # El JSON del parche solo trae la página 3: la 4 debe conservar su traducción anterior
+    patch_json = tmp_path / "patch.json"
+    make_translated_json(patch_json, {3: "Folio 3"})
+    reconstruct_pdf(str(patch_json), str(original), str(book), pages=[3, 4], base_pdf=str(book))
+
+    texts = page_texts(book)
+    assert len(texts) == 5
+    assert "Folio 3" in texts[2]
+    assert "Hoja 3" not in texts[2]
+    assert "Hoja 4" in texts[3]
+    assert "Hoja 1" in texts[0]
+
+
+def test_patch_rejects_base_with_different_page_count(tmp_path, original, make_pdf):
+    base = tmp_path / "base.pdf"
+    make_pdf(base, 2)
+    json_path = tmp_path / "translated.json"
+    make_translated_json(json_path, {1: "Hoja 1"})
+    with pytest.raises(ValueError):
+        reconstruct_pdf(str(json_path), str(original), str(tmp_path / "out.pdf"), base_pdf=str(base))
+
+
+def test_out_of_range_pages_raise(tmp_path, original):
+    json_path = tmp_path / "translated.json"
+    make_translated_json(json_path, {1: "Hoja 1"})
+    with pytest.raises(ValueError):
+        reconstruct_pdf(str(json_path), str(original), str(tmp_path / "out.pdf"), pages=[9])
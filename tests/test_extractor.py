@@ -0,0 +1,43 @@
+"""
+Pruebas de la extracción de texto digital, incluida la selección de páginas.
+"""
+import pytest
+
+from extract.extractor import extract_text, save_to_json
+from utils.utils import parse_page_ranges
+
+
+@pytest.fixture
+def digital_pdf(tmp_path, make_pdf):
+    return make_pdf(tmp_path / "digital.pdf", 4)
+
+
+def test_extract_all_pages(digital_pdf):
+    data = extract_text(str(digital_pdf))
+    assert [page["number"] for page in data["pages"]] == [1, 2, 3, 4]
+    block = data["pages"][0]["blocks"][0]
+    assert block["text"] == "Page 1"
+    assert len(block["bbox"]) == 4
+    assert block["size"] == pytest.approx(12)
+
+
+def test_extract_selected_pages_only(digital_pdf):
+    data = extract_text(str(digital_pdf), pages=[4, 2])
+    assert [page["number"] for page in data["pages"]] == [2, 4]
+    assert data["pages"][1]["blocks"][0]["text"] == "Page 4"
+
+
+def test_extract_accepts_page_ranges(digital_pdf):
+    data = extract_text(str(digital_pdf), pages=parse_page_ranges("2-3"))
+    assert [page["number"] for page in data["pages"]] == [2, 3]
+
+
+def test_extract_rejects_pages_outside_document(digital_pdf):
+    with pytest.raises(ValueError):
+        extract_text(str(digital_pdf), pages=[5])
+
+
+def test_save_to_json_creates_directory(tmp_path):
+    output = tmp_path / "nested" / "data.json"
+    save_to_json({"pages": []}, str(output))
+    assert output.read_text(encoding="utf-8").strip().startswith("{")
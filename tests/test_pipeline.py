@@ -0,0 +1,121 @@
+"""
+Pruebas de la orquestación asíncrona de OCR y traducción sobre PDFs generados.
+Tesseract se sustituye por un script que imita su interfaz (lee la imagen por stdin y escribe texto).
+"""
+import asyncio
+import sys
+import time
+
+import pytesseract
+import pytest
+
+from pipeline.async_pipeline import extract_and_translate_async, format_timings
+
+
+@pytest.fixture
+def fake_tesseract(tmp_path, monkeypatch):
+    """Instala un ejecutable que imita a Tesseract y devuelve la función para cambiar su salida."""
+    if sys.platform == "win32":
+        pytest.skip("El Tesseract simulado es un script de shell")
+
+    def install(body):
+        script = tmp_path / "tesseract"
+        script.write_text("#!/bin/sh\ncat > /dev/null\n" + body + "\n")
+        script.chmod(0o755)
+        monkeypatch.setattr(pytesseract.pytesseract, "tesseract_cmd", str(script))
+
+    return install
+
+
+def test_digital_pdf_is_translated_and_returns_timings(tmp_path, make_pdf, fake_pipeline):
+    pdf = make_pdf(tmp_path / "digital.pdf", 4)
+    data, timings = asyncio.run(extract_and_translate_async(str(pdf), fake_pipeline))
+    assert [page["number"] for page in data["pages"]] == [1, 2, 3, 4]
+    assert data["pages"][2]["blocks"][0]["translated"] == "ES Page 3"
+    assert timings["pages"] == 4
+    assert timings["scanned_pages"] == 0
+    assert timings["ocr_calls"] == 0
+    assert timings["wall_seconds"] > 0
+
+
+def test_mixed_pdf_ocrs_scanned_pages(tmp_path, make_pdf, fake_pipeline, fake_tesseract):
+    fake_tesseract('echo "Scanned text"')
+    pdf = make_pdf(tmp_path / "mixed.pdf", 4, scanned_pages=(1, 3))
+    data, timings = asyncio.run(extract_and_translate_async(str(pdf), fake_pipeline, ocr_concurrency=1))
+    translated = [[block["translated"] for block in page["blocks"]] for page in data["pages"]]
+    assert translated == [["ES Scanned text"], ["ES Page 2"], ["ES Scanned text"], ["ES Page 4"]]
+    assert data["pages"][0]["blocks"][0]["font"] == "OCR"
+    assert timings["scanned_pages"] == 2
+    assert timings["ocr_calls"] == 2
+
+
+def test_selected_pages_only(tmp_path, make_pdf, fake_pipeline, fake_tesseract):
+    fake_tesseract('echo "Scanned text"')
+    pdf = make_pdf(tmp_path / "mixed.pdf", 4, scanned_pages=(1,))
+    data, timings = asyncio.run(extract_and_translate_async(str(pdf), fake_pipeline, pages=[2, 4]))
+    assert [page["number"] for page in data["pages"]] == [2, 4]
+    assert timings["ocr_calls"] == 0
+
+
+def test_digital_pages_are_translated_while_ocr_runs(tmp_path, make_pdf, fake_pipeline, fake_tesseract):
+    fake_tesseract('sleep 1\necho "Scanned text"')
+    # Las páginas escaneadas van primero: las digitales no deben esperar a su OCR
+    pdf = make_pdf(tmp_path / "mixed.pdf", 5, scanned_pages=(1, 2))
+    calls = []
+
+    def slow_pipeline(batch):
+        calls.append((time.perf_counter(), list(batch)))
+        time.sleep(0.5)
+        return fake_pipeline(batch)
+
+    started = time.perf_counter()
+    data, timings = asyncio.run(extract_and_translate_async(str(pdf), slow_pipeline, ocr_concurrency=1))
+
+    # Los números van enmascarados y los bloques idénticos se traducen una sola vez
+    first_call_time, first_batch = calls[0]
+    assert first_batch == ["Page [[0]]"]
+    # La primera llamada a Tesseract dura 1 s: la traducción digital empezó antes de que terminara
+    assert first_call_time - started < 0.9
+    assert timings["ocr_summed_seconds"] >= 2.0
+    assert timings["wall_seconds"] < timings["ocr_summed_seconds"] + timings["translation_seconds"] - 0.4
+    assert data["pages"][0]["blocks"][0]["translated"] == "ES Scanned text"
+
+
+def test_translation_error_stops_pending_ocr(tmp_path, make_pdf, fake_tesseract):
+    fake_tesseract('sleep 2\necho "Scanned text"')
+    pdf = make_pdf(tmp_path / "mixed.pdf", 5, scanned_pages=(2, 3, 4, 5))
+
+    def failing_pipeline(batch):
+        raise RuntimeError("modelo caído")
+
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="modelo caído"):
+        asyncio.run(extract_and_translate_async(str(pdf), failing_pipeline, ocr_concurrency=1))
+    # Sin esperar a las 4 páginas escaneadas (8 s de OCR)
+    assert time.perf_counter() - started < 1.5
+
+
+def test_tesseract_failure_propagates(tmp_path, make_pdf, fake_pipeline, fake_tesseract):
+    fake_tesseract('echo boom >&2\nexit 3')
+    pdf = make_pdf(tmp_path / "scanned.pdf", 4, scanned_pages=(2,))
+    with pytest.raises(pytesseract.TesseractError):
+        asyncio.run(extract_and_translate_async(str(pdf), fake_pipeline))
+
+
+@pytest.mark.parametrize("ocr_concurrency", [0, -1])
+def test_invalid_ocr_concurrency_is_rejected(tmp_path, make_pdf, fake_pipeline, ocr_concurrency):
+    pdf = make_pdf(tmp_path / "scanned.pdf", 2, scanned_pages=(1,))
+    with pytest.raises(ValueError, match="ocr_concurrency"):
+        asyncio.run(extract_and_translate_async(str(pdf), fake_pipeline, ocr_concurrency=ocr_concurrency))
+
+
+def test_format_timings_reports_sequential_estimate():
+    timings = {
+        "pages": 4, "scanned_pages": 2, "pdf_seconds": 0.5, "ocr_calls": 2,
+        "ocr_busy_seconds": 1.0, "ocr_summed_seconds": 2.0,
+        "translation_batches": 3, "translation_seconds": 1.5, "wall_seconds": 2.0,
+    }
+    report = format_timings(timings)
+    assert "Estimación secuencial:             4.00 s" in report
+    assert "Etapa más lenta (límite):          1.50 s" in report
+    assert "50.0 %" in report
@@ -0,0 +1,120 @@
+"""
+Pruebas del módulo de traducción: enmascarado de contenido protegido, glosario y traducción de bloques.
+"""
+from translate.translator import (
+    DEFAULT_MASKING_PATTERN,
+    build_masking_pattern,
+    is_translatable,
+    mask_text,
+    missing_placeholders,
+    translate_blocks,
+    unmask_text,
+)
+
+
+def test_is_translatable():
+    assert is_translatable("Hello world")
+    assert not is_translatable("   ")
+    assert not is_translatable("= 3 + 4")
+    assert not is_translatable("x + y")
+
+
+def test_mask_unmask_roundtrip():
+    text = "See https://example.com/a_b. for details [3] and call os.path.join() with $x^2$ in 2.0"
+    masked, replacements = mask_text(text, DEFAULT_MASKING_PATTERN)
+    assert "https://" not in masked
+    assert replacements == ["https://example.com/a_b", "[3]", "os.path.join()", "$x^2$", "2.0"]
+    assert unmask_text(masked, replacements) == text
+
+
+def test_unmask_tolerates_spaces_inside_markers():
+    assert unmask_text("Ver [ [0] ] y [[1]]", ["A", "B"]) == "Ver A y B"
+
+
+def test_currency_is_not_masked_as_math():
+    masked, replacements = mask_text("costs $5 and $10 today", DEFAULT_MASKING_PATTERN)
+    assert "and" in masked
+    assert replacements == ["5", "10"]
+
+
+def test_prose_with_dots_is_not_masked():
+    for text in ["This is common, e.g. in the U.S. today", "the end.Next chapter", "say hello.World"]:
+        masked, replacements = mask_text(text, DEFAULT_MASKING_PATTERN)
+        assert replacements == [], text
+        assert masked == text
+
+
+def test_code_like_dotted_identifiers_are_masked():
+    _, replacements = mask_text("Set self.max_len and call obj.run() first", DEFAULT_MASKING_PATTERN)
+    assert replacements == ["self.max_len", "obj.run()"]
+
+
+def test_glossary_longest_match_and_whole_words():
+    glossary = {"neural": "neuronal", "neural network": "red neuronal", "net": "red"}
+    pattern = build_masking_pattern(glossary)
+    masked, replacements = mask_text("A neural network, a neural net and a network", pattern, glossary)
+    assert masked == "A [[0]], a [[1]] [[2]] and a network"
+    assert replacements == ["red neuronal", "neuronal", "red"]
+
+
+def test_missing_placeholders():
+    assert missing_placeholders("Visita [[0]] y [[2]]", ["a", "b", "c"]) == [1]
+    assert missing_placeholders("sin marcadores", []) == []
+
+
+def test_translate_blocks_masks_and_deduplicates(fake_pipeline):
+    calls = []
+
+    def pipeline(batch):
+        calls.extend(batch)
+        return fake_pipeline(batch)
+
+    blocks = [{"text": "Figure 3"}, {"text": "Figure 4"}, {"text": "http://x.org"}, {"text": "42"}]
+    translate_blocks(blocks, pipeline)
+    assert calls == ["Figure [[0]]"]
+    assert [block["translated"] for block in blocks] == ["ES Figure 3", "ES Figure 4", "http://x.org", "42"]
+
+
+def test_translate_blocks_applies_glossary(fake_pipeline):
+    glossary = {"PyTorch": "PyTorch", "neural network": "red neuronal"}
+    pattern = build_masking_pattern(glossary)
+    blocks = [{"text": "Train the neural network with PyTorch"}]
+    translate_blocks(blocks, fake_pipeline, masking_pattern=pattern, glossary=glossary)
+    assert blocks[0]["translated"] == "ES Train the red neuronal with PyTorch"
+
+
+def test_translate_blocks_falls_back_when_markers_are_dropped(caplog):
+    def lossy_pipeline(batch):
+        # Pierde los marcadores del texto enmascarado, pero traduce el texto sin enmascarar
+        return [{"translation_text": "X" if "[[" in text else f"ES {text}"} for text in batch]
+
+    blocks = [{"text": "Visit https://example.com for details"}]
+    with caplog.at_level("WARNING"):
+        translate_blocks(blocks, lossy_pipeline)
+    assert blocks[0]["translated"] == "ES Visit https://example.com for details"
+    assert "marcadores" in caplog.text
+
+
+def test_fallback_keeps_glossary_translations(caplog):
+    def lossy_pipeline(batch):
+        # Pierde los marcadores cuando hay más de uno; con solo el del glosario los conserva
+        return [{"translation_text": "X" if "[[1]]" in text else f"ES {text}"} for text in batch]
+
+    glossary = {"neural network": "red neuronal"}
+    pattern = build_masking_pattern(glossary)
+    blocks = [{"text": "Visit https://example.com to train the neural network"}]
+    with caplog.at_level("WARNING"):
+        translate_blocks(blocks, lossy_pipeline, masking_pattern=pattern, glossary=glossary)
+    assert blocks[0]["translated"] == "ES Visit https://example.com to train the red neuronal"
+    assert "marcadores" in caplog.text
+
+
+def test_fallback_appends_glossary_terms_lost_twice():
+    def dropping_pipeline(batch):
+        return [{"translation_text": "X"} for _ in batch]
+
+    glossary = {"neural network": "red neuronal"}
+    pattern = build_masking_pattern(glossary)
+    blocks = [{"text": "Train the neural network"}]
+    translate_blocks(blocks, dropping_pipeline, masking_pattern=pattern, glossary=glossary)
+    assert blocks[0]["translated"] == "X red neuronal"
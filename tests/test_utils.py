@@ -0,0 +1,53 @@
+"""
+Pruebas de las funciones auxiliares de selección de páginas.
+"""
+import time
+
+import pytest
+
+from utils.utils import page_in_selection, parse_page_ranges, select_pages
+
+
+def test_parse_page_ranges_keeps_ranges_unexpanded():
+    assert parse_page_ranges("40-42, 120,41") == [range(40, 43), range(120, 121), range(41, 42)]
+    assert parse_page_ranges("7") == [range(7, 8)]
+    assert parse_page_ranges("3-3,") == [range(3, 4)]
+
+
+def test_select_pages_merges_and_sorts_ranges():
+    assert select_pages(parse_page_ranges("40-42, 120,41"), 200) == [40, 41, 42, 120]
+
+
+def test_huge_range_fails_immediately():
+    started = time.perf_counter()
+    ranges = parse_page_ranges("1-50000000")
+    with pytest.raises(ValueError, match="1-50000000"):
+        select_pages(ranges, 300)
+    assert time.perf_counter() - started < 0.5
+
+
+def test_page_in_selection():
+    ranges = parse_page_ranges("40-60,120")
+    assert page_in_selection(40, ranges)
+    assert page_in_selection(120, ranges)
+    assert not page_in_selection(61, ranges)
+    assert page_in_selection(3, [1, 3])
+
+
+@pytest.mark.parametrize("spec", ["", " , ", "5-2", "0", "0-3", "a", "1-b"])
+def test_parse_page_ranges_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_page_ranges(spec)
+
+
+def test_select_pages_defaults_to_all_pages():
+    assert select_pages(None, 3) == [1, 2, 3]
+    assert select_pages(None, 0) == []
+
+
+def test_select_pages_deduplicates_and_validates():
+    assert select_pages([3, 1, 3], 3) == [1, 3]
+    with pytest.raises(ValueError):
+        select_pages([4], 3)
+    with pytest.raises(ValueError):
+        select_pages([0], 3)